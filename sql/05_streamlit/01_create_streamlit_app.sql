@@ -18,6 +18,7 @@
  *   3. Inventory Status - Stock levels, alerts, reorder suggestions
  *   4. Product Analysis - Top sellers, slow movers
  *   5. Location Comparison - Store performance
+ *   6. Markdown Simulator - Price-response what-if on revenue, margin, leftovers
  *
  * CLEANUP:
  *   See sql/99_cleanup/teardown_all.sql
@@ -80,4 +81,5 @@ GRANT USAGE ON STREAMLIT SFE_THE_LEADERBOARD TO ROLE PUBLIC;
  *   - Category and vendor performance
  *   - Inventory alerts (Critical/Low/Adequate)
  *   - Location performance comparison
+ *   - Markdown what-if simulation (Monte Carlo over category price response)
  ******************************************************************************/
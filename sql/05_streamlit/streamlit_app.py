@@ -9,6 +9,7 @@ Expires: 2026-04-10
 """
 
 import streamlit as st
+import numpy as np
 import pandas as pd
 from snowflake.snowpark.context import get_active_session
 
@@ -345,6 +346,83 @@ def get_vendor_performance(tournament_year: int) -> pd.DataFrame:
     """
     return session.sql(query).to_pandas()
 
+@st.cache_data(ttl=300)
+def get_price_response_history() -> pd.DataFrame:
+    """Get average selling price and units per tournament day per style for every tournament."""
+    query = """
+    SELECT
+        p.category,
+        s.style_number,
+        s.tournament_id,
+        SUM(s.unit_price * s.quantity_sold) / NULLIF(SUM(s.quantity_sold), 0) AS avg_price,
+        SUM(s.quantity_sold) / t.tournament_days AS units_per_day
+    FROM SNOWFLAKE_EXAMPLE.SFE_MERCH_ANALYTICS.SFE_FCT_SALES s
+    JOIN SNOWFLAKE_EXAMPLE.SFE_MERCH_ANALYTICS.SFE_DIM_PRODUCTS p
+        ON s.style_number = p.style_number
+    JOIN SNOWFLAKE_EXAMPLE.SFE_MERCH_ANALYTICS.SFE_DIM_TOURNAMENTS t
+        ON s.tournament_id = t.tournament_id
+    GROUP BY p.category, s.style_number, s.tournament_id, t.tournament_days
+    """
+    return session.sql(query).to_pandas()
+
+@st.cache_data(ttl=300)
+def get_markdown_baseline(tournament_year: int, day_label: str) -> pd.DataFrame:
+    """Get full-price units sold on the target day and stock on hand going into it."""
+    query = f"""
+    WITH target_day AS (
+        SELECT d.full_date
+        FROM SNOWFLAKE_EXAMPLE.SFE_MERCH_ANALYTICS.SFE_DIM_DATES d
+        JOIN SNOWFLAKE_EXAMPLE.SFE_MERCH_ANALYTICS.SFE_DIM_TOURNAMENTS t
+            ON d.tournament_id = t.tournament_id
+        WHERE t.tournament_year = {tournament_year}
+          AND d.tournament_day_label = '{day_label}'
+    ),
+    day_sales AS (
+        SELECT
+            s.style_number,
+            SUM(s.quantity_sold) AS baseline_units
+        FROM SNOWFLAKE_EXAMPLE.SFE_MERCH_ANALYTICS.SFE_FCT_SALES s
+        JOIN target_day td
+            ON s.transaction_date = td.full_date
+        GROUP BY s.style_number
+    ),
+    on_hand AS (
+        SELECT
+            style_number,
+            SUM(ending_qty) AS on_hand
+        FROM (
+            SELECT i.style_number, i.location_id, i.ending_qty
+            FROM SNOWFLAKE_EXAMPLE.SFE_MERCH_ANALYTICS.SFE_FCT_INVENTORY i
+            JOIN SNOWFLAKE_EXAMPLE.SFE_MERCH_ANALYTICS.SFE_DIM_TOURNAMENTS t
+                ON i.tournament_id = t.tournament_id
+            JOIN target_day td
+                ON i.snapshot_date < td.full_date
+            WHERE t.tournament_year = {tournament_year}
+            QUALIFY ROW_NUMBER() OVER (
+                PARTITION BY i.style_number, i.location_id
+                ORDER BY i.snapshot_date DESC
+            ) = 1
+        )
+        GROUP BY style_number
+    )
+    SELECT
+        p.style_number,
+        p.product_name,
+        p.category,
+        p.is_dated_year,
+        p.unit_cost,
+        p.retail_price,
+        COALESCE(ds.baseline_units, 0) AS baseline_units,
+        oh.on_hand
+    FROM SNOWFLAKE_EXAMPLE.SFE_MERCH_ANALYTICS.SFE_DIM_PRODUCTS p
+    LEFT JOIN day_sales ds
+        ON p.style_number = ds.style_number
+    LEFT JOIN on_hand oh
+        ON p.style_number = oh.style_number
+    ORDER BY p.style_number
+    """
+    return session.sql(query).to_pandas()
+
 # =============================================================================
 # HELPER FUNCTIONS
 # =============================================================================
@@ -373,6 +451,153 @@ def calculate_yoy_change(current: float, prior: float) -> tuple:
     change = ((current - prior) / prior) * 100
     return (change, change >= 0)
 
+# =============================================================================
+# MARKDOWN SIMULATION
+# =============================================================================
+# Retail apparel typically sits around -1.5. Categories where no style has
+# changed price between tournaments have nothing to fit and use the prior.
+ELASTICITY_PRIOR_MEAN = -1.5
+ELASTICITY_PRIOR_SD = 0.5
+MAX_ELASTICITY = -0.1  # Demand must fall (at least a little) as price rises
+MIN_PRICE_CHANGE = 0.01  # A style counts as repriced above a ~1% log price move
+MIN_REPRICED_STYLES = 3
+SIMULATION_CHUNK_CELLS = 2_000_000  # draws x products evaluated per batch
+
+def estimate_category_elasticity(history_df: pd.DataFrame) -> pd.DataFrame:
+    """Estimate per-category price elasticity from historical sales.
+
+    Fits log(units/day) on log(price) within style across tournaments, so
+    the slope reflects a style's own price changes rather than the mix of
+    cheap and expensive styles, then shrinks it toward the prior by
+    precision. Categories without enough repriced styles use the prior.
+    """
+    df = history_df.assign(
+        AVG_PRICE=history_df['AVG_PRICE'].astype(float),
+        UNITS_PER_DAY=history_df['UNITS_PER_DAY'].astype(float),
+    )
+    df = df[(df['AVG_PRICE'] > 0) & (df['UNITS_PER_DAY'] > 0)].copy()
+
+    df['LOG_P'] = np.log(df['AVG_PRICE'])
+    df['LOG_Q'] = np.log(df['UNITS_PER_DAY'])
+    # Style fixed effects, then tournament effects so growth is not read as price response
+    styles = df.groupby('STYLE_NUMBER')
+    df['X'] = df['LOG_P'] - styles['LOG_P'].transform('mean')
+    df['Y'] = df['LOG_Q'] - styles['LOG_Q'].transform('mean')
+    groups = df.groupby(['CATEGORY', 'TOURNAMENT_ID'])
+    df['X'] = df['X'] - groups['X'].transform('mean')
+    df['Y'] = df['Y'] - groups['Y'].transform('mean')
+    df['XX'] = df['X'] * df['X']
+    df['XY'] = df['X'] * df['Y']
+    df['YY'] = df['Y'] * df['Y']
+    df['REPRICED'] = (styles['LOG_P'].transform('max') - styles['LOG_P'].transform('min')) > MIN_PRICE_CHANGE
+
+    stats = df.groupby('CATEGORY').agg(
+        OBSERVATIONS=('X', 'size'),
+        STYLES=('STYLE_NUMBER', 'nunique'),
+        TOURNAMENTS=('TOURNAMENT_ID', 'nunique'),
+        SXX=('XX', 'sum'),
+        SXY=('XY', 'sum'),
+        SYY=('YY', 'sum'),
+    )
+    stats['REPRICED_STYLES'] = (
+        df[df['REPRICED']].groupby('CATEGORY')['STYLE_NUMBER'].nunique()
+        .reindex(stats.index, fill_value=0)
+    )
+    dof = stats['OBSERVATIONS'] - stats['STYLES'] - stats['TOURNAMENTS']
+    valid = (dof > 0) & (stats['REPRICED_STYLES'] >= MIN_REPRICED_STYLES) & (stats['SXX'] > 1e-9)
+
+    sxx = stats['SXX'].where(valid, 1.0)
+    slope = stats['SXY'] / sxx
+    residual_var = ((stats['SYY'] - slope * stats['SXY']) / dof.where(valid, 1)).clip(lower=0)
+    slope_se = np.sqrt(residual_var / sxx).clip(lower=1e-3)
+
+    prior_precision = 1 / ELASTICITY_PRIOR_SD ** 2
+    data_precision = np.where(valid, 1 / slope_se ** 2, 0.0)
+    posterior_precision = prior_precision + data_precision
+    posterior_mean = (
+        prior_precision * ELASTICITY_PRIOR_MEAN + data_precision * slope.where(valid, 0.0)
+    ) / posterior_precision
+
+    return pd.DataFrame({
+        'CATEGORY': stats.index,
+        'REPRICED_STYLES': stats['REPRICED_STYLES'].to_numpy(),
+        'SOURCE': np.where(valid, 'Fitted', 'Prior'),
+        'FITTED_ELASTICITY': slope.where(valid).to_numpy(),
+        'ELASTICITY': np.minimum(posterior_mean, MAX_ELASTICITY),
+        'ELASTICITY_SD': np.sqrt(1 / posterior_precision),
+    }).reset_index(drop=True)
+
+def simulate_markdown(
+    baseline_df: pd.DataFrame,
+    elasticity_df: pd.DataFrame,
+    markdown_pct: float,
+    marked_down: np.ndarray,
+    n_draws: int,
+    seed: int = 42,
+) -> pd.DataFrame:
+    """Monte Carlo projection of revenue, margin and leftover units for one day.
+
+    Each draw samples one elasticity per category and Poisson demand per
+    product, evaluated across the whole catalog as a (draws x products)
+    array in fixed-size batches. Styles without a stock snapshot are not
+    capped and are left out of the leftover count. Returns one row per draw.
+    """
+    cat_idx, cat_names = pd.factorize(baseline_df['CATEGORY'])
+    lookup = elasticity_df.set_index('CATEGORY')
+    cat_mean = lookup['ELASTICITY'].reindex(cat_names).fillna(ELASTICITY_PRIOR_MEAN).to_numpy(float)
+    cat_sd = lookup['ELASTICITY_SD'].reindex(cat_names).fillna(ELASTICITY_PRIOR_SD).to_numpy(float)
+
+    base_units = baseline_df['BASELINE_UNITS'].astype(float).to_numpy()
+    stock = baseline_df['ON_HAND'].astype(float).clip(lower=0).fillna(np.inf).to_numpy()
+    tracked = np.isfinite(stock)
+    price_mult = np.where(marked_down, 1 - markdown_pct / 100, 1.0)
+    price = baseline_df['RETAIL_PRICE'].astype(float).to_numpy() * price_mult
+    unit_margin = price - baseline_df['UNIT_COST'].astype(float).to_numpy()
+    log_price_mult = np.log(price_mult)
+
+    rng = np.random.default_rng(seed)
+    chunk = max(1, SIMULATION_CHUNK_CELLS // max(len(base_units), 1))
+    results = np.empty((n_draws, 3))
+    for start in range(0, n_draws, chunk):
+        stop = min(start + chunk, n_draws)
+        elasticity = np.minimum(
+            rng.normal(cat_mean, cat_sd, size=(stop - start, len(cat_names))),
+            MAX_ELASTICITY,
+        )
+        demand = rng.poisson(base_units * np.exp(elasticity[:, cat_idx] * log_price_mult))
+        sold = np.minimum(demand, stock)
+        results[start:stop, 0] = sold @ price
+        results[start:stop, 1] = sold @ unit_margin
+        results[start:stop, 2] = (stock[tracked] - sold[:, tracked]).sum(axis=1)
+
+    return pd.DataFrame(results, columns=['REVENUE', 'MARGIN', 'LEFTOVER_UNITS'])
+
+@st.cache_data(ttl=300)
+def run_markdown_scenarios(
+    tournament_year: int,
+    day_label: str,
+    markdown_pct: int,
+    categories: tuple,
+    dated_only: bool,
+    n_draws: int,
+) -> tuple:
+    """Simulate the markdown and a no-markdown baseline with the same draws.
+
+    Returns (scenario_df, baseline_df, elasticity_df, items_marked_down,
+    untracked_styles).
+    """
+    products = get_markdown_baseline(tournament_year, day_label)
+    elasticity_df = estimate_category_elasticity(get_price_response_history())
+
+    marked_down = products['CATEGORY'].isin(categories).to_numpy()
+    if dated_only:
+        marked_down &= products['IS_DATED_YEAR'].astype(bool).to_numpy()
+
+    scenario_df = simulate_markdown(products, elasticity_df, markdown_pct, marked_down, n_draws)
+    baseline_df = simulate_markdown(products, elasticity_df, 0, marked_down, n_draws)
+    untracked = int(products['ON_HAND'].isna().sum())
+    return scenario_df, baseline_df, elasticity_df, int(marked_down.sum()), untracked
+
 # =============================================================================
 # SIDEBAR
 # =============================================================================
@@ -394,6 +619,7 @@ with st.sidebar:
     show_inventory = st.checkbox("Inventory Status", value=True)
     show_products = st.checkbox("Product Analysis", value=True)
     show_locations = st.checkbox("Location Analysis", value=True)
+    show_markdown = st.checkbox("Markdown Simulator", value=True)
 
     st.markdown("---")
 
@@ -641,6 +867,123 @@ if show_locations:
     else:
         st.info("No location data available")
 
+# =============================================================================
+# MARKDOWN SIMULATOR SECTION
+# =============================================================================
+if show_markdown:
+    st.markdown('<div class="section-header">🏷️ Markdown Simulator</div>', unsafe_allow_html=True)
+
+    category_options = sorted(get_category_sales(tournament_year)['CATEGORY'].tolist())
+
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        day_label = st.selectbox(
+            "Markdown Day",
+            options=['Final Round', 'Round 4 (Moving Day)', 'Round 3', 'Round 2', 'Round 1'],
+            index=0,
+            help="Tournament day the markdown applies to"
+        )
+        markdown_pct = st.slider("Markdown %", min_value=0, max_value=60, value=20, step=5)
+
+    with col2:
+        md_categories = st.multiselect(
+            "Categories to Mark Down",
+            options=category_options,
+            default=category_options,
+        )
+        dated_only = st.checkbox("Dated-year items only", value=True)
+
+    with col3:
+        n_draws = st.select_slider(
+            "Scenario Draws",
+            options=[1_000, 5_000, 10_000, 25_000, 50_000],
+            value=10_000,
+            help="Monte Carlo draws of category price response and daily demand"
+        )
+
+    scenario_df, no_markdown_df, elasticity_df, items_marked, untracked = run_markdown_scenarios(
+        tournament_year, day_label, markdown_pct, tuple(md_categories), dated_only, n_draws
+    )
+
+    with col4:
+        st.markdown(f"""
+        <div class="kpi-card">
+            <p class="kpi-value">{items_marked}</p>
+            <p class="kpi-label">Styles Marked Down</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+    if markdown_pct == 0 or items_marked == 0:
+        st.info("No styles are marked down - pick a markdown % above zero and at least one category with matching items")
+    else:
+        # Median projections vs. selling everything at full price
+        col1, col2, col3 = st.columns(3)
+        kpis = [
+            (col1, 'REVENUE', 'Projected Revenue (P50)', format_currency),
+            (col2, 'MARGIN', 'Projected Margin (P50)', format_currency),
+            (col3, 'LEFTOVER_UNITS', 'Leftover Units (P50)', format_number),
+        ]
+        for col, metric, label, formatter in kpis:
+            with col:
+                projected = scenario_df[metric].median()
+                change, is_positive = calculate_yoy_change(projected, no_markdown_df[metric].median())
+                # Fewer leftover units is the good direction
+                is_good = is_positive != (metric == 'LEFTOVER_UNITS')
+                st.markdown(f"""
+                <div class="kpi-card">
+                    <p class="kpi-value">{formatter(projected)}</p>
+                    <p class="kpi-label">{label}</p>
+                    <span class="kpi-delta-{"positive" if is_good else "negative"}">{"↑" if is_positive else "↓"} {abs(change):.1f}% vs. no markdown</span>
+                </div>
+                """, unsafe_allow_html=True)
+        if untracked > 0:
+            st.caption(
+                f"{untracked} styles have no stock snapshot before {day_label}: "
+                "their demand is not capped and they are excluded from leftover units"
+            )
+
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.markdown("##### Margin Impact Distribution")
+            margin_delta = scenario_df['MARGIN'] - no_markdown_df['MARGIN']
+            counts, edges = np.histogram(margin_delta, bins=30)
+            # Numeric bin midpoints keep the bars in order on the axis
+            chart_data = pd.DataFrame(
+                {'Draws': counts},
+                index=pd.Index((edges[:-1] + edges[1:]) / 2, name='Margin Change ($)'),
+            )
+            st.bar_chart(chart_data)
+            st.caption(f"Markdown beats full price on margin in {(margin_delta > 0).mean() * 100:.0f}% of draws")
+
+        with col2:
+            st.markdown("##### Projection Range (P10 / P50 / P90)")
+            rows = []
+            for name, df in [('Markdown', scenario_df), ('No Markdown', no_markdown_df)]:
+                for metric, label in [('REVENUE', 'Revenue'), ('MARGIN', 'Margin'), ('LEFTOVER_UNITS', 'Leftover Units')]:
+                    p10, p50, p90 = np.percentile(df[metric], [10, 50, 90])
+                    fmt = "{:,.0f}" if metric == 'LEFTOVER_UNITS' else "${:,.0f}"
+                    rows.append([name, label, fmt.format(p10), fmt.format(p50), fmt.format(p90)])
+            display_df = pd.DataFrame(rows, columns=['Scenario', 'Metric', 'P10', 'P50', 'P90'])
+            st.dataframe(display_df, use_container_width=True)
+
+    st.markdown("##### Estimated Price Response by Category")
+    display_df = elasticity_df[['CATEGORY', 'SOURCE', 'REPRICED_STYLES', 'FITTED_ELASTICITY', 'ELASTICITY', 'ELASTICITY_SD']].copy()
+    display_df['FITTED_ELASTICITY'] = display_df['FITTED_ELASTICITY'].apply(
+        lambda x: f"{x:.2f}" if pd.notna(x) else "n/a"
+    )
+    display_df['ELASTICITY'] = display_df['ELASTICITY'].apply(lambda x: f"{x:.2f}")
+    display_df['ELASTICITY_SD'] = display_df['ELASTICITY_SD'].apply(lambda x: f"±{x:.2f}")
+    display_df.columns = ['Category', 'Source', 'Repriced Styles', 'Fitted', 'Used', 'Uncertainty']
+    st.dataframe(display_df, use_container_width=True)
+    if (elasticity_df['SOURCE'] == 'Prior').any():
+        st.caption(
+            f"Prior: fewer than {MIN_REPRICED_STYLES} styles in the category changed price "
+            "between tournaments, so the "
+            f"retail prior ({ELASTICITY_PRIOR_MEAN} ± {ELASTICITY_PRIOR_SD}) is used unchanged"
+        )
+
 # =============================================================================
 # FOOTER
 # =============================================================================